@@ -1991,7 +1991,8 @@ pub async fn preview_import(files: Vec<ImportFile>) -> Result<PreviewResult, App
         paths.push(path);
     }
 
-    let result = call_sidecar("import", json!({"files": paths})).await?;
+    // The field mapper shows the raw source text, which the sidecar omits by default.
+    let result = call_sidecar("import", json!({"files": paths, "include_raw": true})).await?;
 
     let spells: Vec<PreviewSpell> =
         serde_json::from_value(result.get("spells").cloned().unwrap_or(json!([])))
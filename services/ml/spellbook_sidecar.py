@@ -2,80 +2,421 @@ import hashlib
 import json
 import os
 import re
+import sqlite3
 import sys
+import time
 import uuid
-from datetime import datetime
+from collections import OrderedDict, defaultdict
+from contextlib import closing
+from functools import lru_cache
 from html import escape as html_escape
+from importlib import import_module
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, DefaultDict, Dict, List, Tuple
 
-# Optional imports for parsers (dependencies should be installed)
+# orjson is optional; it is much faster than the stdlib json module.
 try:
-    from pdfminer.high_level import extract_text as extract_pdf_text
+    import orjson
 except ImportError:
-    extract_pdf_text = None
+    orjson = None
 
-try:
-    from docx import Document  # type: ignore
-except ImportError:
-    Document = None
+
+# Optional PDF parser dependencies (should be installed). They are imported on
+# first use so that embed/export requests do not pay for loading them.
+def _pymupdf_extract_text(path: str) -> str:
+    import pymupdf
+
+    with pymupdf.open(path) as doc:
+        return "\n".join(page.get_text("text") for page in doc)
+
+
+def _pypdfium2_extract_text(path: str) -> str:
+    import pypdfium2 as pdfium
+
+    pages = []
+    with closing(pdfium.PdfDocument(path)) as pdf:
+        for page in pdf:
+            with closing(page), closing(page.get_textpage()) as textpage:
+                pages.append(textpage.get_text_range())
+    # PDFium ends lines with CRLF; the other backends use plain newlines.
+    return "\n".join(pages).replace("\r\n", "\n")
+
+
+def _pdfminer_extract_text(path: str) -> str:
+    from pdfminer.high_level import extract_text
+
+    return extract_text(path)
+
+
+# Extractor for each backend, with the module that must import for it to work.
+_PDF_BACKENDS: Dict[str, Tuple[str, Any]] = {
+    "pymupdf": ("pymupdf", _pymupdf_extract_text),
+    "pypdfium2": ("pypdfium2", _pypdfium2_extract_text),
+    "pdfminer": ("pdfminer.high_level", _pdfminer_extract_text),
+}
+
+
+# pypdfium2 is much faster than pdfminer.six. PyMuPDF is fast too but AGPL
+# licensed, so it is only used when SPELLBOOK_PDF_BACKEND pins it.
+_DEFAULT_PDF_BACKENDS = ("pypdfium2", "pdfminer")
+
+
+def _select_pdf_backend() -> Tuple[str, Any] | None:
+    preferred = os.environ.get("SPELLBOOK_PDF_BACKEND", "").strip().lower()
+    return _resolve_pdf_backend(preferred)
+
+
+@lru_cache(maxsize=None)
+def _resolve_pdf_backend(preferred: str) -> Tuple[str, Any] | None:
+    # A mistyped pin must not quietly fall back to the default order.
+    if preferred and preferred not in _PDF_BACKENDS:
+        raise ValueError(
+            f"Unknown SPELLBOOK_PDF_BACKEND {preferred!r}; "
+            f"expected one of {', '.join(_PDF_BACKENDS)}"
+        )
+    order = (preferred,) if preferred else _DEFAULT_PDF_BACKENDS
+    for name in order:
+        module, extract = _PDF_BACKENDS[name]
+        # Actually import it: an installed backend can still fail to load,
+        # e.g. when its native library is missing.
+        try:
+            import_module(module)
+        except (ImportError, OSError):
+            continue
+        return name, extract
+    return None
+
+
+def extract_pdf_text(path: str) -> str:
+    # The backend is picked on first use so embed/export never import one.
+    backend = _select_pdf_backend()
+    if backend is None:
+        preferred = os.environ.get("SPELLBOOK_PDF_BACKEND", "").strip().lower()
+        if preferred:
+            package = "pdfminer.six" if preferred == "pdfminer" else preferred
+            raise ImportError(
+                f"SPELLBOOK_PDF_BACKEND={preferred}: {package} is not installed"
+            )
+        raise ImportError("pypdfium2 or pdfminer.six not installed")
+    return backend[1](path)
+
+
+# DOCX text comes straight from the document XML with the standard library.
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_DOCX_RUN_TEXT = {
+    _W_NS + "tab": "\t",
+    _W_NS + "ptab": "\t",
+    _W_NS + "cr": "\n",
+    _W_NS + "noBreakHyphen": "-",
+}
+
+
+def _docx_run_text(run: Any) -> str:
+    chunks = []
+    for child in run:
+        if child.tag == _W_NS + "t":
+            chunks.append(child.text or "")
+        elif child.tag == _W_NS + "br":
+            # Only line breaks are text; page and column breaks are not.
+            if child.get(_W_NS + "type", "textWrapping") == "textWrapping":
+                chunks.append("\n")
+        else:
+            chunks.append(_DOCX_RUN_TEXT.get(child.tag, ""))
+    return "".join(chunks)
+
+
+# Text of each body paragraph. Only the main document part is read, and each
+# top-level element is dropped once handled, so no whole tree is kept.
+def extract_docx_paragraphs(path: str) -> List[str]:
+    import zipfile
+    from xml.etree.ElementTree import fromstring, iterparse
+
+    with zipfile.ZipFile(path) as archive:
+        part = "word/document.xml"
+        rels = fromstring(archive.read("_rels/.rels"))
+        for rel in rels:
+            if rel.get("Type", "").endswith("/officeDocument"):
+                part = rel.get("Target", part).lstrip("/")
+                break
+        paragraphs = []
+        depth = 0
+        with archive.open(part) as xml:
+            for event, elem in iterparse(xml, events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    continue
+                depth -= 1
+                # w:document > w:body > top-level paragraphs and tables.
+                if depth != 2:
+                    continue
+                if elem.tag == _W_NS + "p":
+                    chunks = []
+                    for child in elem:
+                        if child.tag == _W_NS + "r":
+                            chunks.append(_docx_run_text(child))
+                        elif child.tag == _W_NS + "hyperlink":
+                            chunks.extend(
+                                _docx_run_text(run)
+                                for run in child.findall(_W_NS + "r")
+                            )
+                    paragraphs.append("".join(chunks))
+                elem.clear()
+    return paragraphs
+
+
+def _esc(value: str | None) -> str:
+    # Most optional spell fields are empty, so skip html.escape for those.
+    return html_escape(value) if value else ""
 
 
 def _now_iso() -> str:
-    return datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+    # Plain integer formatting: no datetime object and no deprecated utcnow().
+    t = time.gmtime()
+    return (
+        f"{t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d}"
+        f"T{t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d}Z"
+    )
 
 
-def _read_request() -> Dict[str, Any]:
-    raw = sys.stdin.readline()
-    if not raw:
-        raise RuntimeError("No input")
-    return json.loads(raw)
+def _loads(raw: bytes) -> Any:
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+
+def _dumps(payload: Any) -> bytes:
+    # orjson produces UTF-8 bytes directly; they go straight to the binary
+    # stdout buffer without a decode/encode round trip.
+    if orjson:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
 
 
 def _write_response(payload: Dict[str, Any]) -> None:
-    sys.stdout.write(json.dumps(payload, ensure_ascii=False) + "\n")
-    sys.stdout.flush()
+    out = sys.stdout.buffer
+    # Two writes instead of concatenating, which would copy a large export
+    # response once more just to append the newline.
+    out.write(_dumps(payload))
+    out.write(b"\n")
+    out.flush()
+
 
+# Sent ahead of the response to the current request.
+def _write_notification(method: str, params: Dict[str, Any]) -> None:
+    _write_response({"jsonrpc": "2.0", "method": method, "params": params})
 
-def _zero_vector(size: int = 384) -> List[float]:
-    return [0.0] * size
+
+# Placeholder embedding. It is never mutated, only serialized, so every
+# vector in a response can share this one tuple.
+_ZERO_VECTOR: Tuple[float, ...] = (0.0,) * 384
 
 
 def _compute_hash(path: Path) -> str:
-    sha256 = hashlib.sha256()
-    with path.open("rb") as f:
-        while True:
-            chunk = f.read(65536)
-            if not chunk:
-                break
-            sha256.update(chunk)
-    return sha256.hexdigest()
+    # file_digest runs the read/update loop in C rather than per chunk in Python.
+    # It reads into its own buffer, so an unbuffered file skips a copy.
+    with path.open("rb", buffering=0) as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+_LEVEL_RE = re.compile(r"(?:Level|Lvl)[:\s]*(\d+)", re.IGNORECASE)
+
+# Bump whenever parser output changes so cached spells are re-parsed.
+_PARSER_VERSION = 1
+
+
+# Several sidecars can share the cache, so each write commits on its own and a
+# locked database is waited on only briefly before the write is skipped.
+_PARSE_CACHE_BUSY_TIMEOUT = 0.1
+
+
+# The on-disk cache is opt-in: None unless SPELLBOOK_CACHE_DIR is set.
+def _open_parse_cache() -> sqlite3.Connection | None:
+    cache_dir = os.environ.get("SPELLBOOK_CACHE_DIR")
+    if not cache_dir:
+        return None
+    try:
+        cache_path = Path(cache_dir).expanduser()
+        cache_path.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            cache_path / "parse_cache.sqlite3",
+            timeout=_PARSE_CACHE_BUSY_TIMEOUT,
+            isolation_level=None,
+        )
+        # WAL lets readers run alongside another sidecar's write.
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS parsed_spell "
+            "(key TEXT PRIMARY KEY, spell TEXT NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS file_hash "
+            "(key TEXT PRIMARY KEY, hash TEXT NOT NULL)"
+        )
+    except (OSError, sqlite3.Error):
+        return None
+    return conn
+
+
+# Files modified this recently are not added to the hash cache: a second write
+# within the same timestamp tick could keep mtime and size unchanged.
+_HASH_CACHE_MIN_AGE_NS = 2_000_000_000
+
 
+def _hash_cache_key(path: Path, st: os.stat_result) -> str:
+    return f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}"
 
-def _parse_front_matter(text: str) -> Dict[str, Any]:
+
+def _hash_cache_get(conn: sqlite3.Connection, key: str) -> str | None:
+    try:
+        row = conn.execute(
+            "SELECT hash FROM file_hash WHERE key = ?", (key,)
+        ).fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+def _hash_is_cacheable(st: os.stat_result) -> bool:
+    return time.time_ns() - st.st_mtime_ns >= _HASH_CACHE_MIN_AGE_NS
+
+
+# Writes return False when they fail, e.g. because the database is locked.
+def _hash_cache_set(conn: sqlite3.Connection, key: str, file_hash: str) -> bool:
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO file_hash (key, hash) VALUES (?, ?)",
+            (key, file_hash),
+        )
+    except sqlite3.Error:
+        return False
+    return True
+
+
+def _parse_cache_key(file_hash: str, path: Path) -> str:
+    # The path is part of the key because names and _source_file derive from it.
+    key = f"v{_PARSER_VERSION}:{file_hash}:{path}"
+    if path.suffix.lower() == ".pdf":
+        # PDF text depends on the backend, so switching backends re-parses.
+        try:
+            backend = _select_pdf_backend()
+        except ValueError:
+            backend = None
+        key += f":{backend[0] if backend else ''}"
+    return key
+
+
+def _parse_cache_get(conn: sqlite3.Connection, key: str) -> Dict[str, Any] | None:
+    try:
+        row = conn.execute(
+            "SELECT spell FROM parsed_spell WHERE key = ?", (key,)
+        ).fetchone()
+    except sqlite3.Error:
+        return None
+    return json.loads(row[0]) if row else None
+
+
+def _parse_cache_set(conn: sqlite3.Connection, key: str, spell: Dict[str, Any]) -> bool:
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO parsed_spell (key, spell) VALUES (?, ?)",
+            (key, json.dumps(spell, ensure_ascii=False)),
+        )
+    except sqlite3.Error:
+        return False
+    return True
+
+
+# Parsed spells for this process, keyed like the on-disk cache. Entries are
+# copied in and out so callers can modify the spells they get back.
+_SPELL_MEMO: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_SPELL_MEMO_SIZE = 4096
+
+
+# File hashes for this process, keyed like the on-disk hash cache, so a
+# resident sidecar does not re-read unchanged files even without a cache dir.
+_HASH_MEMO: "OrderedDict[str, str]" = OrderedDict()
+_HASH_MEMO_SIZE = 4096
+
+
+def _hash_memo_set(key: str, file_hash: str) -> None:
+    _HASH_MEMO[key] = file_hash
+    _HASH_MEMO.move_to_end(key)
+    if len(_HASH_MEMO) > _HASH_MEMO_SIZE:
+        _HASH_MEMO.popitem(last=False)
+
+
+def _copy_spell(spell: Dict[str, Any]) -> Dict[str, Any]:
+    # Parsed spells are flat apart from their _confidence scores, so this is a
+    # full copy at a fraction of the cost of copy.deepcopy.
+    copied = dict(spell)
+    if "_confidence" in copied:
+        copied["_confidence"] = dict(copied["_confidence"])
+    return copied
+
+
+def _memo_get(key: str) -> Dict[str, Any] | None:
+    spell = _SPELL_MEMO.get(key)
+    if spell is None:
+        return None
+    _SPELL_MEMO.move_to_end(key)
+    return _copy_spell(spell)
+
+
+def _memo_set(key: str, spell: Dict[str, Any]) -> None:
+    _SPELL_MEMO[key] = _copy_spell(spell)
+    if len(_SPELL_MEMO) > _SPELL_MEMO_SIZE:
+        _SPELL_MEMO.popitem(last=False)
+
+
+# (front matter, body); the body is the whole text if there is no front matter.
+def _parse_front_matter(text: str) -> Tuple[Dict[str, Any], str]:
     if not text.startswith("---"):
-        return {}
+        return {}, text
     parts = text.split("---", 2)
     if len(parts) < 3:
-        return {}
+        return {}, text
     front = parts[1]
     data: Dict[str, Any] = {}
     for line in front.splitlines():
-        if not line.strip() or ":" not in line:
-            continue
-        key, value = line.split(":", 1)
-        data[key.strip()] = value.strip()
-    return data
-
-
-def _spell_from_markdown(path: Path) -> Dict[str, Any]:
-    text = path.read_text(encoding="utf-8", errors="ignore")
-    meta = _parse_front_matter(text)
-    description = text
-    if text.startswith("---"):
-        parts = text.split("---", 2)
-        if len(parts) == 3:
-            description = parts[2].strip()
+        key, sep, value = line.partition(":")
+        if sep:
+            data[key.strip()] = value.strip()
+    return data, parts[2].strip()
+
+
+# Markdown confidence for fields missing from the front matter; copied per
+# spell and raised for the fields that are present.
+_MARKDOWN_CONFIDENCE: Dict[str, float] = {
+    "name": 0.3,
+    "level": 0.2,
+    "school": 0.0,
+    "description": 0.1,
+    "source": 0.0,
+    "sphere": 0.0,
+    "class_list": 0.0,
+    "range": 0.0,
+    "components": 0.0,
+    "duration": 0.0,
+}
+_MARKDOWN_CONFIDENCE_FIELDS = (
+    "name",
+    "level",
+    "school",
+    "source",
+    "sphere",
+    "range",
+    "components",
+    "duration",
+)
+
+
+def _spell_from_markdown(path: Path, data: bytes | None = None) -> Dict[str, Any]:
+    if data is None:
+        text = path.read_text(encoding="utf-8", errors="ignore")
+    else:
+        # Same result as read_text, including its universal newline handling.
+        text = data.decode("utf-8", errors="ignore")
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    meta, description = _parse_front_matter(text)
     name = meta.get("name") or path.stem.replace("_", " ").title()
 
     level_val = str(meta.get("level") or 0).lower().strip()
@@ -104,19 +445,14 @@ def _spell_from_markdown(path: Path) -> Dict[str, Any]:
             level = 0
 
     # Confidence scoring: 1.0 if field is in metadata, lower if heuristic/fallback
-    confidence: Dict[str, float] = {}
-    confidence["name"] = 1.0 if meta.get("name") else 0.3
-    confidence["level"] = 1.0 if meta.get("level") else 0.2
-    confidence["school"] = 1.0 if meta.get("school") else 0.0
-    confidence["description"] = 0.9 if description else 0.1
-    confidence["source"] = 1.0 if meta.get("source") else 0.0
-    confidence["sphere"] = 1.0 if meta.get("sphere") else 0.0
-    confidence["class_list"] = (
-        1.0 if meta.get("class_list") or meta.get("classes") else 0.0
-    )
-    confidence["range"] = 1.0 if meta.get("range") else 0.0
-    confidence["components"] = 1.0 if meta.get("components") else 0.0
-    confidence["duration"] = 1.0 if meta.get("duration") else 0.0
+    confidence = _MARKDOWN_CONFIDENCE.copy()
+    for key in _MARKDOWN_CONFIDENCE_FIELDS:
+        if meta.get(key):
+            confidence[key] = 1.0
+    if description:
+        confidence["description"] = 0.9
+    if meta.get("class_list") or meta.get("classes"):
+        confidence["class_list"] = 1.0
 
     spell = {
         "name": name,
@@ -152,13 +488,11 @@ def _spell_from_markdown(path: Path) -> Dict[str, Any]:
 
 
 def _spell_from_pdf(path: Path) -> Dict[str, Any]:
-    if not extract_pdf_text:
-        raise ImportError("pdfminer.six not installed")
     text = extract_pdf_text(str(path))
     # Heuristic: First line is name? Or filename fallback.
     # Level extraction heuristic
     level = 0
-    level_match = re.search(r"(?:Level|Lvl)[:\s]*(\d+)", text, re.IGNORECASE)
+    level_match = _LEVEL_RE.search(text)
     if level_match:
         level = int(level_match.group(1))
 
@@ -187,14 +521,10 @@ def _spell_from_pdf(path: Path) -> Dict[str, Any]:
 
 
 def _spell_from_docx(path: Path) -> Dict[str, Any]:
-    if not Document:
-        raise ImportError("python-docx not installed")
-    doc = Document(str(path))
-    text_chunks = [p.text for p in doc.paragraphs]
-    text = "\n\n".join(text_chunks)
+    text = "\n\n".join(extract_docx_paragraphs(str(path)))
 
     level = 0
-    level_match = re.search(r"(?:Level|Lvl)[:\s]*(\d+)", text, re.IGNORECASE)
+    level_match = _LEVEL_RE.search(text)
     if level_match:
         level = int(level_match.group(1))
 
@@ -224,7 +554,7 @@ def _spell_from_docx(path: Path) -> Dict[str, Any]:
 
 def handle_embed(params: Dict[str, Any]) -> Dict[str, Any]:
     texts = params.get("texts") or []
-    return {"vectors": [_zero_vector() for _ in texts]}
+    return {"vectors": [_ZERO_VECTOR] * len(texts)}
 
 
 def handle_llm_answer(params: Dict[str, Any]) -> Dict[str, Any]:
@@ -235,45 +565,108 @@ def handle_llm_answer(params: Dict[str, Any]) -> Dict[str, Any]:
     return {"answer": answer, "citations": citations, "meta": {"model": "stub"}}
 
 
+_SUPPORTED_EXTENSIONS = {".md", ".pdf", ".docx"}
+
+# (spell, None) on success, (None, conflict reason) on failure.
+_ParseResult = Tuple[Dict[str, Any] | None, str | None]
+
+
+def _parse_spell(path: Path, data: bytes | None = None) -> _ParseResult:
+    ext = path.suffix.lower()
+    try:
+        if ext == ".md":
+            return _spell_from_markdown(path, data), None
+        if ext == ".pdf":
+            return _spell_from_pdf(path), None
+        return _spell_from_docx(path), None
+    except Exception as e:
+        return None, f"parsing_error: {str(e)}"
+
+
 def handle_import(params: Dict[str, Any]) -> Dict[str, Any]:
     files = params.get("files") or []
+    # _raw_text duplicates the whole source file, so only send it when asked.
+    include_raw = bool(params.get("include_raw", False))
+    # When streaming, each spell is sent as an "import.spell" notification as
+    # soon as it is ready and the final result carries no spells.
+    stream = bool(params.get("stream", False))
     spells: List[Dict[str, Any]] = []
     artifacts: List[Dict[str, Any]] = []
     conflicts: List[Dict[str, Any]] = []
+    cache = _open_parse_cache()
+    # After one failed write (another sidecar holds the lock) the rest of the
+    # import only reads the cache, so it never waits on the lock again.
+    cache_writes = cache is not None
+    # One timestamp for the whole batch rather than a fresh one per file.
+    imported_at = _now_iso()
 
-    for file_path in files:
-        path = Path(file_path)
-        if not path.exists():
-            conflicts.append({"path": file_path, "reason": "missing"})
-            continue
-
-        ext = path.suffix.lower()
-        file_hash = _compute_hash(path)
-        spell: Dict[str, Any] = {}
+    try:
+        for file_path in files:
+            path = Path(file_path)
+            if not path.exists():
+                conflicts.append({"path": file_path, "reason": "missing"})
+                continue
 
-        try:
-            if ext == ".md":
-                spell = _spell_from_markdown(path)
-            elif ext == ".pdf":
-                spell = _spell_from_pdf(path)
-            elif ext == ".docx":
-                spell = _spell_from_docx(path)
-            else:
+            ext = path.suffix.lower()
+            if ext not in _SUPPORTED_EXTENSIONS:
                 conflicts.append({"path": str(path), "reason": "unsupported_extension"})
                 continue
-        except Exception as e:
-            conflicts.append({"path": str(path), "reason": f"parsing_error: {str(e)}"})
-            continue
 
-        spells.append(spell)
-        artifacts.append(
-            {
-                "type": ext.lstrip("."),
-                "path": str(path),
-                "hash": file_hash,
-                "imported_at": _now_iso(),
-            }
-        )
+            # Unchanged files (same path, mtime and size) reuse their known
+            # hash and, when their spell is cached too, are not read at all.
+            data = None
+            st = path.stat()
+            hash_key = _hash_cache_key(path, st)
+            file_hash = _HASH_MEMO.get(hash_key)
+            if file_hash is None and cache:
+                file_hash = _hash_cache_get(cache, hash_key)
+            if file_hash is None:
+                # Markdown is read once and the same bytes are hashed and
+                # parsed. PDF/DOCX parsing costs far more than a second read
+                # from the page cache.
+                if ext == ".md":
+                    data = path.read_bytes()
+                    file_hash = hashlib.sha256(data).hexdigest()
+                else:
+                    file_hash = _compute_hash(path)
+                if cache_writes and _hash_is_cacheable(st):
+                    cache_writes = _hash_cache_set(cache, hash_key, file_hash)
+            if _hash_is_cacheable(st):
+                _hash_memo_set(hash_key, file_hash)
+            cache_key = _parse_cache_key(file_hash, path)
+            spell = _memo_get(cache_key)
+            if spell is None and cache:
+                spell = _parse_cache_get(cache, cache_key)
+                if spell is not None:
+                    _memo_set(cache_key, spell)
+            if spell is None:
+                if ext == ".md" and data is None:
+                    data = path.read_bytes()
+                spell, error = _parse_spell(path, data)
+                if error:
+                    conflicts.append({"path": str(path), "reason": error})
+                    continue
+                _memo_set(cache_key, spell)
+                if cache_writes:
+                    cache_writes = _parse_cache_set(cache, cache_key, spell)
+
+            if not include_raw:
+                spell.pop("_raw_text", None)
+            if stream:
+                _write_notification("import.spell", {"spell": spell})
+            else:
+                spells.append(spell)
+            artifacts.append(
+                {
+                    "type": ext.lstrip("."),
+                    "path": str(path),
+                    "hash": file_hash,
+                    "imported_at": imported_at,
+                }
+            )
+    finally:
+        if cache:
+            cache.close()
 
     return {"spells": spells, "artifacts": artifacts, "conflicts": conflicts}
 
@@ -298,20 +691,19 @@ def handle_export(params: Dict[str, Any]) -> Dict[str, Any]:
         elif mode == "spellbook_pack":
             text = _render_spellbook_pack_markdown(spells, character, class_name)
         else:
-            # Default/List mode
-            lines = []
-            for spell in spells:
-                lines.append(f"# {spell.get('name')}")
-                lines.append("")
-                lines.append(spell.get("description", "").strip())
-                lines.append("")
-            text = "\n".join(lines).strip() + "\n"
+            # Default/List mode: one formatted chunk per spell, joined once.
+            body = "".join(
+                f"# {spell.get('name')}\n\n{spell.get('description', '').strip()}\n\n"
+                for spell in spells
+            )
+            text = body.strip() + "\n"
 
         output_path.write_text(text, encoding="utf-8")
         return {"path": str(output_path), "format": "md"}
 
+    # Both HTML and "pdf" exports are written as print-optimized HTML.
+    html_path = output_dir / f"spellbook_export_{unique_id}.html"
     if fmt == "html":
-        html_path = output_dir / f"spellbook_export_{unique_id}.html"
         html = _render_print_html(spells, mode, layout, character)
         html_path.write_text(html, encoding="utf-8")
         return {"path": str(html_path), "format": "html"}
@@ -319,7 +711,6 @@ def handle_export(params: Dict[str, Any]) -> Dict[str, Any]:
     if fmt == "pdf":
         # Generate print-optimized HTML instead of PDF
         # Users can use browser "Print to PDF" for actual PDF output
-        html_path = output_dir / f"spellbook_export_{unique_id}.html"
         if mode == "character_sheet":
             html = _render_character_sheet_html(character)
         elif mode == "spellbook_pack":
@@ -339,87 +730,125 @@ def handle_export(params: Dict[str, Any]) -> Dict[str, Any]:
     raise ValueError(f"Unsupported export format: {fmt}")
 
 
-def _render_print_html(
-    spells: List[Dict[str, Any]],
-    mode: str,
-    layout: str,
-    character: Dict[str, Any],
-) -> str:
-    title = "Spellbook Print"
-    if mode == "single" and spells:
-        title = spells[0].get("name") or title
-    elif mode == "spellbook":
-        title = character.get("name") or title
-
-    include_notes = character.get("includeNotes", True)
-
-    body_parts: List[str] = []
-    if mode == "spellbook":
-        body_parts.append(_render_spellbook_header(character))
-    for spell in spells:
-        body_parts.append(_render_spell_block(spell, layout, mode, include_notes))
-
-    body = "\n".join(body_parts)
-    return f"""<!doctype html>
-<html lang="en">
-<head>
-  <meta charset="utf-8" />
-  <title>{html_escape(title)}</title>
-  <style>
-    body {{
+_PRINT_HTML_HEAD = (
+    '<!doctype html>\n<html lang="en">\n<head>\n  <meta charset="utf-8" />\n'
+)
+_PRINT_HTML_STYLE = """  <style>
+    body {
       font-family: "Inter", "Segoe UI", sans-serif;
       color: #111;
       margin: 32px;
-    }}
-    h1, h2, h3 {{
+    }
+    h1, h2, h3 {
       margin: 0 0 8px 0;
-    }}
-    .meta {{
+    }
+    .meta {
       color: #555;
       font-size: 12px;
       margin-bottom: 12px;
-    }}
-    .spell {{
+    }
+    .spell {
       border-bottom: 1px solid #ddd;
       padding: 16px 0;
       page-break-inside: avoid;
-    }}
-    .spell:last-child {{
+    }
+    .spell:last-child {
       border-bottom: none;
-    }}
-    .spell-header {{
+    }
+    .spell-header {
       display: flex;
       justify-content: space-between;
       align-items: baseline;
       gap: 12px;
-    }}
-    .pill {{
+    }
+    .pill {
       display: inline-block;
       background: #f2f2f2;
       border-radius: 999px;
       padding: 2px 8px;
       font-size: 11px;
       margin-right: 6px;
-    }}
-    .details-table {{
+    }
+    .details-table {
       width: 100%;
       border-collapse: collapse;
       font-size: 12px;
-    }}
-    .details-table td {{
+    }
+    .details-table td {
       padding: 4px 6px;
       border: 1px solid #e2e2e2;
-    }}
-    .notes {{
+    }
+    .notes {
       margin-top: 8px;
       font-size: 12px;
       color: #444;
-    }}
+    }
+  </style>
+"""
+_PRINT_HTML_TAIL = "\n</body>\n</html>\n"
+
+
+def _render_print_html(
+    spells: List[Dict[str, Any]],
+    mode: str,
+    layout: str,
+    character: Dict[str, Any],
+) -> str:
+    title = "Spellbook Print"
+    if mode == "single" and spells:
+        title = spells[0].get("name") or title
+    elif mode == "spellbook":
+        title = character.get("name") or title
+
+    include_notes = character.get("includeNotes", True)
+
+    # Build the document as one flat list and join once at the end.
+    parts: List[str] = [
+        _PRINT_HTML_HEAD,
+        f"  <title>{html_escape(title)}</title>\n",
+        _PRINT_HTML_STYLE,
+        "</head>\n    ",
+    ]
+    separator = ""
+    if mode == "spellbook":
+        parts.append(_render_spellbook_header(character))
+        separator = "\n"
+    for spell in spells:
+        parts.append(separator)
+        parts.append(_render_spell_block(spell, layout, mode, include_notes))
+        separator = "\n"
+    parts.append(_PRINT_HTML_TAIL)
+    return "".join(parts)
+
+
+def _group_spells_by_class(
+    character: Dict[str, Any],
+) -> DefaultDict[str, List[Dict[str, Any]]]:
+    spells_by_class: DefaultDict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for spell in character.get("characterSpells") or []:
+        spells_by_class[spell.get("className") or "Other"].append(spell)
+    return spells_by_class
+
+
+_CHARACTER_SHEET_HTML_STYLE = """  <style>
+    body { font-family: "Inter", -apple-system, sans-serif; color: #111; margin: 40px; line-height: 1.5; }
+    h1 { border-bottom: 2px solid #333; padding-bottom: 8px; margin-top: 0; }
+    h2 { background: #f4f4f4; padding: 6px 12px; margin-top: 24px; font-size: 1.2rem; border-left: 4px solid #333; }
+    .header-grid { display: grid; grid-template-columns: 1fr 1fr 1fr; gap: 16px; margin-bottom: 24px; }
+    .ability-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(60px, 1fr)); gap: 8px; text-align: center; }
+    .ability-box { border: 1px solid #ccc; padding: 10px 4px; border-radius: 6px; background: #fafafa; }
+    .ability-val { font-size: 20px; font-weight: bold; color: #222; }
+    .ability-lbl { font-size: 11px; text-transform: uppercase; color: #666; font-weight: 600; margin-top: 2px; }
+    .section { margin-bottom: 30px; }
+    .spell-table { width: 100%; border-collapse: collapse; font-size: 13px; margin-top: 10px; }
+    .spell-table th { text-align: left; background: #eee; padding: 6px 8px; border: 1px solid #ddd; }
+    .spell-table td { padding: 6px 8px; border: 1px solid #ddd; vertical-align: top; }
+    .notes-box { border: 1px solid #ddd; padding: 12px; background: #fffcf0; white-space: pre-wrap; margin-top: 10px; font-size: 14px; }
+    @media print {
+      body { margin: 0; }
+      .section { page-break-inside: avoid; }
+    }
   </style>
-</head>
-    {body}
-</body>
-</html>
 """
 
 
@@ -428,7 +857,7 @@ def _render_character_sheet_html(character: Dict[str, Any]) -> str:
     char_type = html_escape(character.get("characterType") or "PC")
     race = html_escape(character.get("race") or "-")
     alignment = html_escape(character.get("alignment") or "-")
-    notes = html_escape(character.get("notes") or "")
+    notes = _esc(character.get("notes"))
 
     include_com = character.get("includeCom", False)
     include_notes = character.get("includeNotes", True)
@@ -440,78 +869,56 @@ def _render_character_sheet_html(character: Dict[str, Any]) -> str:
     classes = character.get("classes") or []
 
     # Spells grouped by class
-    all_spells = character.get("characterSpells") or []
-    spells_by_class: Dict[str, List[Dict[str, Any]]] = {}
-    for spell in all_spells:
-        cls_name = spell.get("className") or "Other"
-        if cls_name not in spells_by_class:
-            spells_by_class[cls_name] = []
-        spells_by_class[cls_name].append(spell)
-
-    sections_html = ""
+    spells_by_class = _group_spells_by_class(character)
+
+    sections: List[str] = []
     for cls in classes:
         c_name = cls.get("className") or "Unknown"
         c_lbl = cls.get("classLabel") or c_name
         c_lvl = cls.get("level") or 1
 
-        cls_spells = spells_by_class.get(c_name, [])
+        cls_spells = spells_by_class.get(c_name, ())
         spell_table = ""
         if cls_spells:
-            spell_rows = ""
+            spell_rows: List[str] = []
             for s in cls_spells:
                 s_name = html_escape(s.get("name") or "Untitled")
                 s_lvl = s.get("level") or 0
                 s_type = "Prepared" if s.get("prepared") else "Known"
-                s_notes = html_escape(s.get("notes") or "") if include_notes else ""
+                s_notes = _esc(s.get("notes")) if include_notes else ""
                 notes_cell = (
                     f"<br/><small><em>{s_notes}</em></small>" if s_notes else ""
                 )
 
-                spell_rows += f"<tr><td>{s_name}{notes_cell}</td><td>{s_lvl}</td><td>{s_type}</td></tr>"
+                spell_rows.append(
+                    f"<tr><td>{s_name}{notes_cell}</td><td>{s_lvl}</td><td>{s_type}</td></tr>"
+                )
 
             spell_table = f"""
             <table class="spell-table">
                 <thead><tr><th>Spell</th><th>Lvl</th><th>Status</th></tr></thead>
-                <tbody>{spell_rows}</tbody>
+                <tbody>{"".join(spell_rows)}</tbody>
             </table>
             """
 
-        sections_html += f"""
+        sections.append(f"""
         <div class="section">
             <h2>{html_escape(c_lbl)} (Level {c_lvl})</h2>
             {spell_table if spell_table else "<p>No spells recorded.</p>"}
         </div>
-        """
+        """)
+    sections_html = "".join(sections)
 
     com_box = ""
     if include_com:
         com_box = f'<div class="ability-box"><div class="ability-val">{abilities.get("com", 10)}</div><div class="ability-lbl">COM</div></div>'
 
-    return f"""<!doctype html>
-<html lang="en">
-<head>
-  <meta charset="utf-8" />
-  <title>{name} - Character Sheet</title>
-  <style>
-    body {{ font-family: "Inter", -apple-system, sans-serif; color: #111; margin: 40px; line-height: 1.5; }}
-    h1 {{ border-bottom: 2px solid #333; padding-bottom: 8px; margin-top: 0; }}
-    h2 {{ background: #f4f4f4; padding: 6px 12px; margin-top: 24px; font-size: 1.2rem; border-left: 4px solid #333; }}
-    .header-grid {{ display: grid; grid-template-columns: 1fr 1fr 1fr; gap: 16px; margin-bottom: 24px; }}
-    .ability-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(60px, 1fr)); gap: 8px; text-align: center; }}
-    .ability-box {{ border: 1px solid #ccc; padding: 10px 4px; border-radius: 6px; background: #fafafa; }}
-    .ability-val {{ font-size: 20px; font-weight: bold; color: #222; }}
-    .ability-lbl {{ font-size: 11px; text-transform: uppercase; color: #666; font-weight: 600; margin-top: 2px; }}
-    .section {{ margin-bottom: 30px; }}
-    .spell-table {{ width: 100%; border-collapse: collapse; font-size: 13px; margin-top: 10px; }}
-    .spell-table th {{ text-align: left; background: #eee; padding: 6px 8px; border: 1px solid #ddd; }}
-    .spell-table td {{ padding: 6px 8px; border: 1px solid #ddd; vertical-align: top; }}
-    .notes-box {{ border: 1px solid #ddd; padding: 12px; background: #fffcf0; white-space: pre-wrap; margin-top: 10px; font-size: 14px; }}
-    @media print {{
-      body {{ margin: 0; }}
-      .section {{ page-break-inside: avoid; }}
-    }}
-  </style>
-</head>
+    return "".join(
+        (
+            _PRINT_HTML_HEAD,
+            f"  <title>{name} - Character Sheet</title>\n",
+            _CHARACTER_SHEET_HTML_STYLE,
+            f"""</head>
 <body>
   <h1>{name}</h1>
 
@@ -538,6 +945,21 @@ def _render_character_sheet_html(character: Dict[str, Any]) -> str:
   {f'<div class="section"><h2>Notes</h2><div class="notes-box">{notes}</div></div>' if include_notes and notes else ""}
 </body>
 </html>
+""",
+        )
+    )
+
+
+_SPELLBOOK_PACK_HTML_STYLE = """  <style>
+    body { font-family: "Inter", sans-serif; color: #111; margin: 32px; }
+    h1 { margin: 0 0 4px 0; }
+    .subtitle { color: #555; margin-bottom: 24px; font-style: italic; }
+    .spell { border-bottom: 1px solid #ddd; padding: 16px 0; page-break-inside: avoid; }
+    .spell-header { display: flex; justify-content: space-between; align-items: baseline; }
+    .pill { background: #f2f2f2; border-radius: 999px; padding: 2px 8px; font-size: 11px; }
+    .details-table { width: 100%; border-collapse: collapse; font-size: 12px; margin-top: 8px; }
+    .details-table td { padding: 4px 6px; border: 1px solid #e2e2e2; }
+  </style>
 """
 
 
@@ -551,44 +973,32 @@ def _render_spellbook_pack_html(
     title = f"{char_name}'s Spellbook - {html_escape(class_name or 'General')}"
     include_notes = character.get("includeNotes", True)
 
-    spell_blocks = []
-    for spell in spells:
-        spell_blocks.append(_render_spell_block(spell, layout, "pack", include_notes))
-
-    body = "\n".join(spell_blocks)
-
-    return f"""<!doctype html>
-<html lang="en">
-<head>
-  <meta charset="utf-8" />
-  <title>{title}</title>
-  <style>
-    body {{ font-family: "Inter", sans-serif; color: #111; margin: 32px; }}
-    h1 {{ margin: 0 0 4px 0; }}
-    .subtitle {{ color: #555; margin-bottom: 24px; font-style: italic; }}
-    .spell {{ border-bottom: 1px solid #ddd; padding: 16px 0; page-break-inside: avoid; }}
-    .spell-header {{ display: flex; justify-content: space-between; align-items: baseline; }}
-    .pill {{ background: #f2f2f2; border-radius: 999px; padding: 2px 8px; font-size: 11px; }}
-    .details-table {{ width: 100%; border-collapse: collapse; font-size: 12px; margin-top: 8px; }}
-    .details-table td {{ padding: 4px 6px; border: 1px solid #e2e2e2; }}
-  </style>
-</head>
+    body = "\n".join(
+        _render_spell_block(spell, layout, "pack", include_notes) for spell in spells
+    )
+
+    return "".join(
+        (
+            _PRINT_HTML_HEAD,
+            f"  <title>{title}</title>\n",
+            _SPELLBOOK_PACK_HTML_STYLE,
+            f"""</head>
 <body>
   <h1>{char_name}'s Spellbook</h1>
   <div class="subtitle">Class: {html_escape(class_name or "All")}</div>
   {body}
 </body>
 </html>
-"""
+""",
+        )
+    )
 
 
 def _render_spellbook_header(character: Dict[str, Any]) -> str:
-    name = html_escape(character.get("name") or "Spellbook")
-    character_type = html_escape(
-        character.get("type") or character.get("characterType") or ""
-    )
+    name = _esc(character.get("name") or "Spellbook")
+    character_type = _esc(character.get("type") or character.get("characterType"))
     include_notes = character.get("includeNotes", True)
-    notes = html_escape(character.get("notes") or "") if include_notes else ""
+    notes = _esc(character.get("notes")) if include_notes else ""
     meta = f"{character_type} Spellbook" if character_type else "Spellbook"
     notes_block = f"<p class='meta'>{notes}</p>" if notes else ""
     return f"<h1>{name}</h1><p class='meta'>{meta}</p>{notes_block}"
@@ -597,22 +1007,20 @@ def _render_spellbook_header(character: Dict[str, Any]) -> str:
 def _render_spell_block(
     spell: Dict[str, Any], layout: str, mode: str, include_notes: bool = True
 ) -> str:
-    name = html_escape(spell.get("name") or "Untitled")
+    name = _esc(spell.get("name") or "Untitled")
     school_raw = spell.get("school") or ""
     level_raw = str(spell.get("level") or "")
-    school = html_escape(school_raw)
-    level = html_escape(level_raw)
-    description = html_escape(spell.get("description") or "").replace("\n", "<br/>")
-    class_list = html_escape(spell.get("class_list") or spell.get("classList") or "")
-    range_text = html_escape(spell.get("range") or "")
-    components = html_escape(spell.get("components") or "")
-    duration = html_escape(spell.get("duration") or "")
-    saving_throw = html_escape(
-        spell.get("saving_throw") or spell.get("savingThrow") or ""
-    )
+    school = _esc(school_raw)
+    level = _esc(level_raw)
+    description = _esc(spell.get("description")).replace("\n", "<br/>")
+    class_list = _esc(spell.get("class_list") or spell.get("classList"))
+    range_text = _esc(spell.get("range"))
+    components = _esc(spell.get("components"))
+    duration = _esc(spell.get("duration"))
+    saving_throw = _esc(spell.get("saving_throw") or spell.get("savingThrow"))
     prepared = spell.get("prepared")
     known = spell.get("known")
-    notes = html_escape(spell.get("notes") or "") if include_notes else ""
+    notes = _esc(spell.get("notes")) if include_notes else ""
 
     status_bits = []
     if mode == "spellbook":
@@ -625,7 +1033,7 @@ def _render_spell_block(
 
     if layout == "compact":
         details = " ".join(filter(None, [school_raw, f"Level {level_raw}"]))
-        pill = f"<span class='pill'>{html_escape(details)}</span>" if details else ""
+        pill = f"<span class='pill'>{_esc(details)}</span>" if details else ""
         meta_line = " | ".join(
             filter(None, [class_list, range_text, components, duration])
         )
@@ -639,7 +1047,7 @@ def _render_spell_block(
     {pill}
   </div>
   {status_block}
-  <div class="meta">{html_escape(meta_line)}</div>
+  <div class="meta">{_esc(meta_line)}</div>
   <div>{description}</div>
   {notes_block}
 </section>
@@ -703,13 +1111,7 @@ def _render_character_sheet_markdown(character: Dict[str, Any]) -> str:
     lines.append("")
 
     # Spells grouped by class
-    all_spells = character.get("characterSpells") or []
-    spells_by_class: Dict[str, List[Dict[str, Any]]] = {}
-    for spell in all_spells:
-        cls_name = spell.get("className") or "Other"
-        if cls_name not in spells_by_class:
-            spells_by_class[cls_name] = []
-        spells_by_class[cls_name].append(spell)
+    spells_by_class = _group_spells_by_class(character)
 
     # Classes & Spell Tables
     lines.append("## Classes")
@@ -723,7 +1125,7 @@ def _render_character_sheet_markdown(character: Dict[str, Any]) -> str:
             c_lvl = cls.get("level") or 1
             lines.append(f"### {c_lbl} (Level {c_lvl})")
 
-            cls_spells = spells_by_class.get(c_name, [])
+            cls_spells = spells_by_class.get(c_name, ())
             if cls_spells:
                 lines.append("| Spell | Lvl | Status |")
                 lines.append("|:---|:---:|:---|")
@@ -797,9 +1199,11 @@ def _render_spellbook_pack_markdown(
     return "\n".join(lines)
 
 
-def main() -> None:
+def _handle_request(raw: bytes) -> Dict[str, Any]:
+    request_id = None
     try:
-        request = _read_request()
+        request = _loads(raw)
+        request_id = request.get("id")
         method = request.get("method")
         params = request.get("params") or {}
         handlers = {
@@ -811,14 +1215,28 @@ def main() -> None:
         if method not in handlers:
             raise ValueError(f"Unknown method: {method}")
         result = handlers[method](params)
-        response = {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
     except Exception as exc:
-        response = {
+        return {
             "jsonrpc": "2.0",
-            "id": None,
+            "id": request_id,
             "error": {"message": str(exc)},
         }
-    _write_response(response)
+
+
+def main() -> None:
+    # One request per line until stdin is closed, so a caller can keep the
+    # process (and its imported parsers) alive across requests.
+    handled = False
+    for raw in sys.stdin.buffer:
+        if not raw.strip():
+            continue
+        _write_response(_handle_request(raw))
+        handled = True
+    if not handled:
+        _write_response(
+            {"jsonrpc": "2.0", "id": None, "error": {"message": "No input"}}
+        )
 
 
 if __name__ == "__main__":
@@ -1,5 +1,58 @@
-import sys
+import json
 import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Add the parent directory (services/ml) to sys.path so spellbook_sidecar can be imported
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+SIDECAR_PATH = Path(__file__).resolve().parents[1] / "spellbook_sidecar.py"
+
+# Settings that change import results; sidecar processes never inherit them
+# from the developer's shell.
+_SIDECAR_ENV_OVERRIDES = ("SPELLBOOK_CACHE_DIR", "SPELLBOOK_PDF_BACKEND")
+
+
+@pytest.fixture(scope="session")
+def sidecar_env():
+    """Environment for sidecar processes, without the caller's spellbook settings."""
+    return {k: v for k, v in os.environ.items() if k not in _SIDECAR_ENV_OVERRIDES}
+
+
+@pytest.fixture(scope="session")
+def sidecar(sidecar_env):
+    """Send JSON-RPC requests to one resident sidecar process for the session.
+
+    Like the desktop client, notifications are skipped and the first message
+    carrying a result or an error is returned.
+    """
+    process = subprocess.Popen(
+        [sys.executable, str(SIDECAR_PATH)],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        env=sidecar_env,
+    )
+    # Binary pipes: orjson (or json) works on the raw UTF-8 lines directly.
+    dumps = orjson.dumps if orjson else lambda obj: json.dumps(obj).encode("utf-8")
+    loads = orjson.loads if orjson else json.loads
+
+    def send(payload: dict) -> dict:
+        process.stdin.write(dumps(payload) + b"\n")
+        process.stdin.flush()
+        for line in process.stdout:
+            message = loads(line)
+            if "result" in message or "error" in message:
+                return message
+        raise RuntimeError("Sidecar exited without a response")
+
+    yield send
+    process.stdin.close()
+    process.wait(timeout=10)
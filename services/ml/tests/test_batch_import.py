@@ -1,35 +1,13 @@
-import importlib.util
-import json
-import subprocess
-import sys
 import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from html import escape
 from pathlib import Path
-from zipfile import ZIP_DEFLATED, ZipFile
+from zipfile import ZIP_STORED, ZipFile
 
+import pytest
 
-def _sidecar_path() -> Path:
-    return Path(__file__).resolve().parents[1] / "spellbook_sidecar.py"
-
-
-def _load_sidecar_module():
-    spec = importlib.util.spec_from_file_location("spellbook_sidecar", _sidecar_path())
-    if not spec or not spec.loader:
-        raise RuntimeError("Unable to load spellbook_sidecar module")
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
-
-
-def _run_sidecar(payload: dict) -> dict:
-    process = subprocess.run(
-        [sys.executable, str(_sidecar_path())],
-        input=json.dumps(payload) + "\n",
-        text=True,
-        capture_output=True,
-        check=True,
-    )
-    return json.loads(process.stdout)
+import spellbook_sidecar
 
 
 def _write_minimal_pdf(path: Path, text: str) -> None:
@@ -48,30 +26,52 @@ def _write_minimal_pdf(path: Path, text: str) -> None:
         "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
     ]
 
-    content = bytearray()
-    content.extend(b"%PDF-1.4\n%\xff\xff\xff\xff\n")
-
-    offsets = [0]
+    header = b"%PDF-1.4\n%\xff\xff\xff\xff\n"
+    parts = [header]
+    offsets = []
+    position = len(header)
     for idx, body in enumerate(objects, start=1):
-        offsets.append(len(content))
-        content.extend(f"{idx} 0 obj\n".encode("utf-8"))
-        content.extend(body.encode("utf-8"))
-        content.extend(b"\nendobj\n")
-
-    xref_pos = len(content)
-    content.extend(f"xref\n0 {len(offsets)}\n".encode("utf-8"))
-    content.extend(b"0000000000 65535 f \n")
-    for offset in offsets[1:]:
-        content.extend(f"{offset:010d} 00000 n \n".encode("utf-8"))
-
-    content.extend(
+        chunk = f"{idx} 0 obj\n{body}\nendobj\n".encode("utf-8")
+        offsets.append(position)
+        parts.append(chunk)
+        position += len(chunk)
+
+    size = len(offsets) + 1
+    xref = "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    parts.append(
         (
+            f"xref\n0 {size}\n0000000000 65535 f \n{xref}"
             "trailer\n"
-            f"<< /Size {len(offsets)} /Root 1 0 R >>\n"
-            f"startxref\n{xref_pos}\n%%EOF\n"
+            f"<< /Size {size} /Root 1 0 R >>\n"
+            f"startxref\n{position}\n%%EOF\n"
         ).encode("utf-8")
     )
-    path.write_bytes(content)
+    path.write_bytes(b"".join(parts))
+
+
+# Package parts shared by every generated DOCX, encoded once; only
+# document.xml varies per file.
+_DOCX_CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    "</Types>"
+).encode("utf-8")
+_DOCX_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    "</Relationships>"
+).encode("utf-8")
+_DOCX_DOCUMENT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships"/>'
+).encode("utf-8")
 
 
 def _write_minimal_docx(path: Path, text: str) -> None:
@@ -88,44 +88,17 @@ def _write_minimal_docx(path: Path, text: str) -> None:
         "</w:body>"
         "</w:document>"
     )
-    content_types_xml = (
-        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
-        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
-        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
-        '<Default Extension="xml" ContentType="application/xml"/>'
-        '<Override PartName="/word/document.xml" '
-        'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
-        "</Types>"
-    )
-    rels_xml = (
-        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
-        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
-        '<Relationship Id="rId1" '
-        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
-        'Target="word/document.xml"/>'
-        "</Relationships>"
-    )
-    doc_rels_xml = (
-        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
-        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships"/>'
-    )
 
-    with ZipFile(path, "w", compression=ZIP_DEFLATED) as docx:
-        docx.writestr("[Content_Types].xml", content_types_xml)
-        docx.writestr("_rels/.rels", rels_xml)
+    with ZipFile(path, "w", compression=ZIP_STORED) as docx:
+        docx.writestr("[Content_Types].xml", _DOCX_CONTENT_TYPES_XML)
+        docx.writestr("_rels/.rels", _DOCX_RELS_XML)
         docx.writestr("word/document.xml", document_xml)
-        docx.writestr("word/_rels/document.xml.rels", doc_rels_xml)
+        docx.writestr("word/_rels/document.xml.rels", _DOCX_DOCUMENT_RELS_XML)
 
 
-def generate_test_spells(
-    tmp_path: Path, md_count: int, pdf_count: int, docx_count: int
-) -> list[Path]:
-    """Generate sample spell files for batch testing."""
-    files = []
-    for i in range(md_count):
-        path = tmp_path / f"spell_md_{i:04d}.md"
-        path.write_text(
-            f"""---
+def _write_markdown_spell(path: Path, i: int) -> None:
+    path.write_bytes(
+        f"""---
 name: Test Spell {i}
 level: {i % 9 + 1}
 school: Evocation
@@ -134,50 +107,79 @@ components: V,S
 duration: Instant
 ---
 This is the description for Test Spell number {i}. It contains enough text to be meaningful.
-""",
-            encoding="utf-8",
-        )
-        files.append(path)
-
-    for i in range(pdf_count):
-        level = i % 9 + 1
-        path = tmp_path / f"spell_pdf_{i:04d}.pdf"
-        _write_minimal_pdf(
-            path,
-            f"Test PDF Spell {i}\nLevel: {level}\nA short PDF description for spell {i}.",
-        )
-        files.append(path)
-
-    for i in range(docx_count):
-        level = i % 9 + 1
-        path = tmp_path / f"spell_docx_{i:04d}.docx"
-        _write_minimal_docx(
-            path,
-            f"Test DOCX Spell {i}\nLevel: {level}\nA short DOCX description for spell {i}.",
-        )
-        files.append(path)
-
-    return files
-
-
-def test_parse_1000_mixed_files(tmp_path: Path):
+""".encode("utf-8")
+    )
+
+
+def _write_pdf_spell(path: Path, i: int) -> None:
+    _write_minimal_pdf(
+        path,
+        f"Test PDF Spell {i}\nLevel: {i % 9 + 1}\nA short PDF description for spell {i}.",
+    )
+
+
+def _write_docx_spell(path: Path, i: int) -> None:
+    _write_minimal_docx(
+        path,
+        f"Test DOCX Spell {i}\nLevel: {i % 9 + 1}\nA short DOCX description for spell {i}.",
+    )
+
+
+def generate_test_spells(
+    tmp_path: Path, md_count: int, pdf_count: int, docx_count: int
+) -> list[Path]:
+    """Generate sample spell files for batch testing."""
+    tasks = [
+        (_write_markdown_spell, tmp_path / f"spell_md_{i:04d}.md", i)
+        for i in range(md_count)
+    ]
+    tasks += [
+        (_write_pdf_spell, tmp_path / f"spell_pdf_{i:04d}.pdf", i)
+        for i in range(pdf_count)
+    ]
+    tasks += [
+        (_write_docx_spell, tmp_path / f"spell_docx_{i:04d}.docx", i)
+        for i in range(docx_count)
+    ]
+
+    # Creating the files is dominated by open/write syscalls, which release
+    # the GIL, so threads overlap them even on a single core.
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda task: task[0](task[1], task[2]), tasks))
+
+    return [path for _, path, _ in tasks]
+
+
+@pytest.fixture(scope="session")
+def spell_corpus(tmp_path_factory):
+    """Generate each (md, pdf, docx) mix of spell files once per session."""
+    corpora: dict[tuple[int, int, int], list[Path]] = {}
+
+    def make(md_count: int, pdf_count: int, docx_count: int) -> list[Path]:
+        counts = (md_count, pdf_count, docx_count)
+        if counts not in corpora:
+            directory = tmp_path_factory.mktemp(
+                f"spells_{md_count}_{pdf_count}_{docx_count}"
+            )
+            corpora[counts] = generate_test_spells(directory, *counts)
+        return corpora[counts]
+
+    return make
+
+
+def test_parse_1000_mixed_files(sidecar, spell_corpus, monkeypatch):
     """Ensure parsing mixed files completes reasonably fast."""
-    sidecar = _load_sidecar_module()
-    pdf_available = sidecar.extract_pdf_text is not None
-    docx_available = sidecar.Document is not None
+    # Match the sidecar, which runs without SPELLBOOK_PDF_BACKEND.
+    monkeypatch.delenv("SPELLBOOK_PDF_BACKEND", raising=False)
+    pdf_available = spellbook_sidecar._select_pdf_backend() is not None
     expected_pdf_count = 100 if pdf_available else 0
-    expected_docx_count = 100 if docx_available else 0
+    expected_docx_count = 100
     expected_md_count = 1000 - expected_pdf_count - expected_docx_count
-    files = generate_test_spells(
-        tmp_path,
-        md_count=expected_md_count,
-        pdf_count=expected_pdf_count,
-        docx_count=expected_docx_count,
-    )
+    files = spell_corpus(expected_md_count, expected_pdf_count, expected_docx_count)
 
     start = time.time()
 
-    response = _run_sidecar(
+    response = sidecar(
         {
             "jsonrpc": "2.0",
             "id": 1,
@@ -193,34 +195,37 @@ def test_parse_1000_mixed_files(tmp_path: Path):
     assert len(spells) == 1000
     assert not response["result"]["conflicts"]
 
-    actual_md_count = 0
-    actual_pdf_count = 0
-    actual_docx_count = 0
-
     # Verify critical fields extracted
-    for spell in spells:
-        source_file = spell.get("_source_file", "")
-        if source_file.endswith(".md"):
-            actual_md_count += 1
-        elif source_file.endswith(".pdf"):
-            actual_pdf_count += 1
-        elif source_file.endswith(".docx"):
-            actual_docx_count += 1
+    names = [spell.get("name") for spell in spells]
+    levels = [spell.get("level") for spell in spells]
+    descriptions = [spell.get("description") for spell in spells]
+    sources = [spell.get("_source_file", "") for spell in spells]
+    assert all(names), "Missing spell name"
+    assert None not in levels, "Missing spell level"
+    assert all(descriptions), "Missing spell description"
+
+    counts = Counter(source.rpartition(".")[2] for source in sources)
+
+    assert counts["md"] == expected_md_count
+    assert counts["pdf"] == expected_pdf_count
+    assert counts["docx"] == expected_docx_count
+
+
+def test_pypdfium2_extracts_fixture_text(tmp_path: Path):
+    pytest.importorskip("pypdfium2")
+    path = tmp_path / "spell.pdf"
+    _write_minimal_pdf(path, "Fixture Spell (Level 3)")
 
-        assert spell.get("name"), "Missing spell name"
-        assert spell.get("level") is not None, "Missing spell level"
-        assert spell.get("description"), "Missing spell description"
+    text = spellbook_sidecar._pypdfium2_extract_text(str(path))
 
-    assert actual_md_count == expected_md_count
-    assert actual_pdf_count == expected_pdf_count
-    assert actual_docx_count == expected_docx_count
+    assert text.strip() == "Fixture Spell (Level 3)"
 
 
-def test_confidence_scores_present(tmp_path: Path):
+def test_confidence_scores_present(sidecar, spell_corpus):
     """Verify that confidence scores are returned for parsed spells."""
-    files = generate_test_spells(tmp_path, md_count=5, pdf_count=0, docx_count=0)
+    files = spell_corpus(5, 0, 0)
 
-    response = _run_sidecar(
+    response = sidecar(
         {
             "jsonrpc": "2.0",
             "id": 1,
@@ -248,13 +253,13 @@ def test_confidence_scores_present(tmp_path: Path):
         ), "Description should have reasonable confidence"
 
 
-def test_low_confidence_for_missing_fields(tmp_path: Path):
+def test_low_confidence_for_missing_fields(sidecar, tmp_path: Path):
     """Verify that missing fields get low confidence scores."""
     # Create a minimal markdown file without frontmatter
     path = tmp_path / "minimal.md"
     path.write_text("Just some text without any metadata.", encoding="utf-8")
 
-    response = _run_sidecar(
+    response = sidecar(
         {
             "jsonrpc": "2.0",
             "id": 1,
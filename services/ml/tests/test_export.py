@@ -92,3 +92,34 @@ def test_handle_export_html_escapes_spell_name_and_description(tmp_path):
     assert "&lt;script&gt;alert(1)&lt;/script&gt; dangerous" in content
     assert "<img src=x onerror=alert(1)>" not in content
     assert "<script>alert(1)</script>" not in content
+
+
+def test_handle_export_camel_case(tmp_path):
+    params = {
+        "spells": [
+            {
+                "name": "Camel Spell",
+                "description": "Camel Case Test.",
+                "classList": "Wizard, Sorcerer",
+                "savingThrow": "Reflex half",
+                "castingTime": "1 action",
+                "materialComponents": "A bit of wool",
+                "level": 3,
+                "school": "Transmutation",
+                "components": "V, S",
+                "range": "60 ft",
+                "duration": "Instantaneous",
+            }
+        ],
+        "character": {"name": "Gandalf", "characterType": "Wizard"},
+        "format": "html",
+        "layout": "standard",
+        "mode": "spellbook",
+        "output_dir": str(tmp_path),
+    }
+    result = handle_export(params)
+
+    content = Path(result["path"]).read_text(encoding="utf-8")
+    assert "Wizard, Sorcerer" in content
+    assert "Reflex half" in content
+    assert "Wizard Spellbook" in content
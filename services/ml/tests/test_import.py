@@ -0,0 +1,235 @@
+import os
+import re
+import sqlite3
+import time
+
+import spellbook_sidecar
+from spellbook_sidecar import handle_import
+
+
+def _write_spell(path, name="Test Spell", level=1):
+    path.write_text(
+        f"---\nname: {name}\nlevel: {level}\n---\nDescription here.", encoding="utf-8"
+    )
+    return path
+
+
+def test_handle_import_reuses_cached_parse(tmp_path, monkeypatch):
+    monkeypatch.setenv("SPELLBOOK_CACHE_DIR", str(tmp_path / "cache"))
+    sample = _write_spell(tmp_path / "spell.md")
+
+    first = handle_import({"files": [str(sample)]})
+    assert first["spells"][0]["name"] == "Test Spell"
+
+    def fail_parse(path, data=None):
+        raise AssertionError("cached spell should not be re-parsed")
+
+    monkeypatch.setattr(spellbook_sidecar, "_spell_from_markdown", fail_parse)
+    spellbook_sidecar._SPELL_MEMO.clear()
+    second = handle_import({"files": [str(sample)]})
+
+    assert second["spells"] == first["spells"]
+    assert second["artifacts"][0]["hash"] == first["artifacts"][0]["hash"]
+    assert not second["conflicts"]
+
+
+def test_handle_import_skips_reading_unchanged_files(tmp_path, monkeypatch):
+    monkeypatch.setenv("SPELLBOOK_CACHE_DIR", str(tmp_path / "cache"))
+    sample = _write_spell(tmp_path / "spell.md")
+    # Files modified in the last moment are never hash-cached.
+    os.utime(sample, ns=(1_000_000_000, 1_000_000_000))
+    first = handle_import({"files": [str(sample)]})
+
+    def fail_read(self):
+        raise AssertionError("unchanged file should not be read")
+
+    monkeypatch.setattr(spellbook_sidecar.Path, "read_bytes", fail_read)
+    spellbook_sidecar._SPELL_MEMO.clear()
+    spellbook_sidecar._HASH_MEMO.clear()
+    second = handle_import({"files": [str(sample)]})
+
+    assert second["spells"] == first["spells"]
+    assert second["artifacts"][0]["hash"] == first["artifacts"][0]["hash"]
+
+
+def test_handle_import_memoizes_hashes_without_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.delenv("SPELLBOOK_CACHE_DIR", raising=False)
+    sample = _write_spell(tmp_path / "spell.md")
+    os.utime(sample, ns=(1_000_000_000, 1_000_000_000))
+    first = handle_import({"files": [str(sample)]})
+
+    def fail_read(self):
+        raise AssertionError("unchanged file should not be read")
+
+    monkeypatch.setattr(spellbook_sidecar.Path, "read_bytes", fail_read)
+    second = handle_import({"files": [str(sample)]})
+
+    assert second["spells"] == first["spells"]
+    assert second["artifacts"][0]["hash"] == first["artifacts"][0]["hash"]
+
+
+def test_handle_import_cache_misses_on_pdf_backend_switch(
+    tmp_path, monkeypatch, request
+):
+    monkeypatch.setenv("SPELLBOOK_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(
+        spellbook_sidecar,
+        "_PDF_BACKENDS",
+        {
+            "pdfminer": ("json", lambda path: "pdfminer text"),
+            "pypdfium2": ("json", lambda path: "pypdfium2 text"),
+        },
+    )
+    spellbook_sidecar._resolve_pdf_backend.cache_clear()
+    request.addfinalizer(spellbook_sidecar._resolve_pdf_backend.cache_clear)
+    sample = tmp_path / "spell.pdf"
+    sample.write_bytes(b"%PDF-1.4")
+
+    def import_with(backend):
+        monkeypatch.setenv("SPELLBOOK_PDF_BACKEND", backend)
+        return handle_import({"files": [str(sample)]})["spells"][0]["description"]
+
+    assert import_with("pdfminer") == "pdfminer text"
+    # Only the on-disk cache is warm now.
+    spellbook_sidecar._SPELL_MEMO.clear()
+    assert import_with("pypdfium2") == "pypdfium2 text"
+    # Both layers hold an entry per backend.
+    assert import_with("pdfminer") == "pdfminer text"
+    spellbook_sidecar._SPELL_MEMO.clear()
+    assert import_with("pypdfium2") == "pypdfium2 text"
+
+
+def test_handle_import_does_not_wait_on_locked_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("SPELLBOOK_CACHE_DIR", str(tmp_path / "cache"))
+    handle_import({"files": [str(_write_spell(tmp_path / "warm.md"))]})
+    files = [str(_write_spell(tmp_path / f"spell_{i}.md")) for i in range(3)]
+    # Another sidecar in the middle of a write holds the database lock.
+    other = sqlite3.connect(tmp_path / "cache" / "parse_cache.sqlite3")
+    other.execute("INSERT INTO file_hash (key, hash) VALUES ('k', 'h')")
+
+    start = time.perf_counter()
+    result = handle_import({"files": files})
+    elapsed = time.perf_counter() - start
+    other.close()
+
+    assert len(result["spells"]) == 3
+    assert elapsed < 1.0
+
+
+def test_handle_import_cache_misses_on_changed_content(tmp_path, monkeypatch):
+    monkeypatch.setenv("SPELLBOOK_CACHE_DIR", str(tmp_path / "cache"))
+    sample = _write_spell(tmp_path / "spell.md", level=1)
+    handle_import({"files": [str(sample)]})
+
+    _write_spell(sample, level=2)
+    result = handle_import({"files": [str(sample)]})
+
+    assert result["spells"][0]["level"] == 2
+
+
+def test_handle_import_without_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.delenv("SPELLBOOK_CACHE_DIR", raising=False)
+    sample = _write_spell(tmp_path / "spell.md")
+
+    result = handle_import({"files": [str(sample)]})
+
+    assert result["spells"][0]["name"] == "Test Spell"
+    assert not (tmp_path / "cache").exists()
+
+
+def test_handle_import_reports_missing_and_unsupported(tmp_path):
+    unsupported = tmp_path / "spell.txt"
+    unsupported.write_text("text", encoding="utf-8")
+
+    result = handle_import({"files": [str(tmp_path / "missing.md"), str(unsupported)]})
+
+    assert result["spells"] == []
+    assert [c["reason"] for c in result["conflicts"]] == [
+        "missing",
+        "unsupported_extension",
+    ]
+
+
+def test_handle_import_keeps_input_order_with_parse_errors(tmp_path):
+    first = _write_spell(tmp_path / "first.md", name="First")
+    bad_pdf = tmp_path / "bad.pdf"
+    bad_pdf.write_bytes(b"not a pdf")
+    second = _write_spell(tmp_path / "second.md", name="Second")
+    bad_docx = tmp_path / "bad.docx"
+    bad_docx.write_bytes(b"not a docx")
+
+    result = handle_import(
+        {"files": [str(first), str(bad_pdf), str(second), str(bad_docx)]}
+    )
+
+    assert [s["name"] for s in result["spells"]] == ["First", "Second"]
+    assert [a["path"] for a in result["artifacts"]] == [str(first), str(second)]
+    assert [c["path"] for c in result["conflicts"]] == [str(bad_pdf), str(bad_docx)]
+    assert all(c["reason"].startswith("parsing_error") for c in result["conflicts"])
+
+
+def test_handle_import_omits_raw_text_by_default(tmp_path):
+    sample = _write_spell(tmp_path / "spell.md")
+
+    result = handle_import({"files": [str(sample)]})
+
+    assert "_raw_text" not in result["spells"][0]
+    assert result["spells"][0]["description"] == "Description here."
+
+
+def test_handle_import_includes_raw_text_when_requested(tmp_path):
+    sample = _write_spell(tmp_path / "spell.md")
+
+    result = handle_import({"files": [str(sample)], "include_raw": True})
+
+    assert result["spells"][0]["_raw_text"] == sample.read_text(encoding="utf-8")
+
+
+def test_handle_import_reuses_parse_for_unchanged_file(tmp_path, monkeypatch):
+    monkeypatch.delenv("SPELLBOOK_CACHE_DIR", raising=False)
+    sample = _write_spell(tmp_path / "spell.md")
+    calls = []
+    parse = spellbook_sidecar._spell_from_markdown
+
+    def counting_parse(path, data=None):
+        calls.append(path)
+        return parse(path, data)
+
+    monkeypatch.setattr(spellbook_sidecar, "_spell_from_markdown", counting_parse)
+    first = handle_import({"files": [str(sample)]})
+    second = handle_import({"files": [str(sample)]})
+    assert second["spells"] == first["spells"]
+    assert len(calls) == 1
+
+    _write_spell(sample, level=2)
+    third = handle_import({"files": [str(sample)]})
+    assert third["spells"][0]["level"] == 2
+    assert len(calls) == 2
+
+
+def test_handle_import_memo_is_not_shared_with_results(tmp_path, monkeypatch):
+    monkeypatch.delenv("SPELLBOOK_CACHE_DIR", raising=False)
+    sample = _write_spell(tmp_path / "spell.md")
+    first = handle_import({"files": [str(sample)]})
+    first["spells"][0]["_confidence"]["name"] = 0.0
+
+    second = handle_import({"files": [str(sample)]})
+
+    assert second["spells"][0]["_confidence"]["name"] == 1.0
+
+
+def test_handle_import_stamps_utc_iso_timestamp(tmp_path):
+    sample = _write_spell(tmp_path / "spell.md")
+
+    result = handle_import({"files": [str(sample)]})
+
+    imported_at = result["artifacts"][0]["imported_at"]
+    assert re.fullmatch(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z", imported_at)
+
+
+def test_handle_import_stamps_batch_with_one_timestamp(tmp_path):
+    files = [str(_write_spell(tmp_path / f"spell_{i}.md")) for i in range(3)]
+
+    result = handle_import({"files": files})
+
+    assert len({a["imported_at"] for a in result["artifacts"]}) == 1
@@ -1,6 +1,8 @@
 import os
 import sys
+import tempfile
 import unittest
+import zipfile
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
@@ -29,14 +31,8 @@ class TestSchemaVersionV2(unittest.TestCase):
             self.assertEqual(result.get("schema_version"), 2)
 
     def test_spell_from_docx_has_schema_version_2(self):
-        with patch("spellbook_sidecar.Document") as mock_document_cls:
-            mock_doc = MagicMock()
-            p1 = MagicMock()
-            p1.text = "Spell"
-            p2 = MagicMock()
-            p2.text = "Desc"
-            mock_doc.paragraphs = [p1, p2]
-            mock_document_cls.return_value = mock_doc
+        with patch("spellbook_sidecar.extract_docx_paragraphs") as mock_extract:
+            mock_extract.return_value = ["Spell", "Desc"]
             p = MagicMock(spec=Path)
             p.stem = "test"
             result = spellbook_sidecar._spell_from_docx(p)
@@ -72,15 +68,9 @@ A bright streak flashes from your pointing finger...
         self.assertEqual(result["name"], "Fireball")
         self.assertEqual(result["source"], "PDF Import")
 
-    @patch("spellbook_sidecar.Document")
-    def test_spell_from_docx(self, mock_document_cls):
-        mock_doc = MagicMock()
-        p1 = MagicMock()
-        p1.text = "Fireball"
-        p2 = MagicMock()
-        p2.text = "Description text"
-        mock_doc.paragraphs = [p1, p2]
-        mock_document_cls.return_value = mock_doc
+    @patch("spellbook_sidecar.extract_docx_paragraphs")
+    def test_spell_from_docx(self, mock_extract):
+        mock_extract.return_value = ["Fireball", "Description text"]
 
         p = MagicMock(spec=Path)
         p.stem = "fireball"
@@ -91,5 +81,152 @@ A bright streak flashes from your pointing finger...
         self.assertTrue("Fireball" in result["description"])
 
 
+class TestDocxParagraphs(unittest.TestCase):
+    def test_extracts_body_paragraph_text(self):
+        w = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+        document_xml = (
+            f"<w:document {w}><w:body>"
+            "<w:p><w:r><w:t>Fireball</w:t><w:tab/><w:t>Level 3</w:t></w:r></w:p>"
+            "<w:p><w:r><w:t>a</w:t><w:br/><w:t>b</w:t>"
+            '<w:br w:type="page"/><w:t>c</w:t></w:r></w:p>'
+            "<w:tbl><w:tr><w:tc><w:p><w:r><w:t>cell</w:t></w:r></w:p></w:tc></w:tr></w:tbl>"
+            "<w:p><w:r><w:t xml:space='preserve'>see </w:t></w:r>"
+            "<w:hyperlink><w:r><w:t>link</w:t></w:r></w:hyperlink></w:p>"
+            "<w:p/>"
+            "</w:body></w:document>"
+        )
+        rels_xml = (
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Target="word/document.xml" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+            "</Relationships>"
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "spell.docx")
+            with zipfile.ZipFile(path, "w") as docx:
+                docx.writestr("_rels/.rels", rels_xml)
+                docx.writestr("word/document.xml", document_xml)
+
+            paragraphs = spellbook_sidecar.extract_docx_paragraphs(path)
+
+        self.assertEqual(paragraphs, ["Fireball\tLevel 3", "a\nbc", "see link", ""])
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_returns_metadata_and_body(self):
+        meta, body = spellbook_sidecar._parse_front_matter(
+            "---\nname: Fireball\nlevel: 3\n---\n\nA bright streak.\n"
+        )
+        self.assertEqual(meta, {"name": "Fireball", "level": "3"})
+        self.assertEqual(body, "A bright streak.")
+
+    def test_without_front_matter_returns_text_as_body(self):
+        text = "Just some text without any metadata."
+        self.assertEqual(spellbook_sidecar._parse_front_matter(text), ({}, text))
+
+
+class TestPdfBackend(unittest.TestCase):
+    def setUp(self):
+        spellbook_sidecar._resolve_pdf_backend.cache_clear()
+        self.addCleanup(spellbook_sidecar._resolve_pdf_backend.cache_clear)
+
+    def _select(self, preferred, import_module=None):
+        import_module = import_module or MagicMock()
+        with patch.dict(os.environ, {"SPELLBOOK_PDF_BACKEND": preferred}):
+            with patch.object(spellbook_sidecar, "import_module", import_module):
+                return spellbook_sidecar._select_pdf_backend()
+
+    def test_env_pins_pdfminer(self):
+        backend = self._select("pdfminer")
+        self.assertEqual(
+            backend, ("pdfminer", spellbook_sidecar._pdfminer_extract_text)
+        )
+
+    def test_prefers_pypdfium2_by_default(self):
+        backend = self._select("")
+        self.assertEqual(
+            backend, ("pypdfium2", spellbook_sidecar._pypdfium2_extract_text)
+        )
+
+    def test_pymupdf_only_when_pinned(self):
+        def only_pymupdf(name):
+            if name != "pymupdf":
+                raise ImportError(f"No module named {name!r}")
+
+        import_module = MagicMock(side_effect=only_pymupdf)
+        self.assertIsNone(self._select("", import_module))
+        self.assertEqual(
+            self._select("pymupdf", import_module),
+            ("pymupdf", spellbook_sidecar._pymupdf_extract_text),
+        )
+
+    def test_env_pins_pypdfium2(self):
+        backend = self._select("pypdfium2")
+        self.assertEqual(
+            backend, ("pypdfium2", spellbook_sidecar._pypdfium2_extract_text)
+        )
+
+    def test_pinned_backend_missing(self):
+        missing = MagicMock(side_effect=ImportError("No module named 'pymupdf'"))
+        self.assertIsNone(self._select("pymupdf", missing))
+
+    def test_unknown_backend_is_an_error(self):
+        import_module = MagicMock()
+        with self.assertRaisesRegex(ValueError, "mupdf"):
+            self._select("mupdf", import_module)
+        import_module.assert_not_called()
+
+    def test_unknown_backend_fails_pdf_import(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf = Path(tmp) / "spell.pdf"
+            pdf.write_bytes(b"%PDF-1.4")
+            with patch.dict(os.environ, {"SPELLBOOK_PDF_BACKEND": "pdfminer.six"}):
+                result = spellbook_sidecar.handle_import({"files": [str(pdf)]})
+        self.assertEqual(result["spells"], [])
+        self.assertIn("SPELLBOOK_PDF_BACKEND", result["conflicts"][0]["reason"])
+
+    def test_pinned_backend_missing_names_it_in_conflict(self):
+        missing = MagicMock(side_effect=ImportError("No module named 'pymupdf'"))
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf = Path(tmp) / "spell.pdf"
+            pdf.write_bytes(b"%PDF-1.4")
+            with patch.dict(os.environ, {"SPELLBOOK_PDF_BACKEND": "pymupdf"}):
+                with patch.object(spellbook_sidecar, "import_module", missing):
+                    result = spellbook_sidecar.handle_import({"files": [str(pdf)]})
+        self.assertEqual(
+            result["conflicts"][0]["reason"],
+            "parsing_error: SPELLBOOK_PDF_BACKEND=pymupdf: pymupdf is not installed",
+        )
+
+    def test_skips_backend_that_fails_to_import(self):
+        def broken_pypdfium2(name):
+            if name == "pypdfium2":
+                raise OSError("libpdfium.so: cannot open shared object file")
+
+        backend = self._select("", MagicMock(side_effect=broken_pypdfium2))
+        self.assertEqual(
+            backend, ("pdfminer", spellbook_sidecar._pdfminer_extract_text)
+        )
+
+    def test_pypdfium2_closes_handles_on_error(self):
+        page = MagicMock()
+        page.get_textpage.return_value.get_text_range.side_effect = RuntimeError
+        pdf = MagicMock()
+        pdf.__iter__.return_value = iter([page])
+        pdfium = MagicMock()
+        pdfium.PdfDocument.return_value = pdf
+        with patch.dict(sys.modules, {"pypdfium2": pdfium}):
+            with self.assertRaises(RuntimeError):
+                spellbook_sidecar._pypdfium2_extract_text("spell.pdf")
+        page.get_textpage.return_value.close.assert_called_once()
+        page.close.assert_called_once()
+        pdf.close.assert_called_once()
+
+    def test_extract_without_backend_raises(self):
+        with patch.object(spellbook_sidecar, "_select_pdf_backend", return_value=None):
+            with self.assertRaises(ImportError):
+                spellbook_sidecar.extract_pdf_text("spell.pdf")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -8,19 +8,8 @@ def _sidecar_path() -> Path:
     return Path(__file__).resolve().parents[1] / "spellbook_sidecar.py"
 
 
-def _run_sidecar(payload: dict) -> dict:
-    process = subprocess.run(
-        [sys.executable, str(_sidecar_path())],
-        input=json.dumps(payload) + "\n",
-        text=True,
-        capture_output=True,
-        check=True,
-    )
-    return json.loads(process.stdout)
-
-
-def test_embed_returns_vectors():
-    response = _run_sidecar(
+def test_embed_returns_vectors(sidecar):
+    response = sidecar(
         {
             "jsonrpc": "2.0",
             "id": 1,
@@ -34,12 +23,22 @@ def test_embed_returns_vectors():
     assert len(vectors[0]) == 384
 
 
-def test_import_markdown(tmp_path: Path):
+def test_handles_successive_requests(sidecar):
+    first = sidecar({"jsonrpc": "2.0", "id": 7, "method": "embed", "params": {}})
+    second = sidecar({"jsonrpc": "2.0", "id": 8, "method": "unknown"})
+
+    assert first["id"] == 7
+    assert first["result"] == {"vectors": []}
+    assert second["id"] == 8
+    assert second["error"]["message"] == "Unknown method: unknown"
+
+
+def test_import_markdown(sidecar, tmp_path: Path):
     sample = tmp_path / "spell.md"
     sample.write_text(
         "---\nname: Test Spell\nlevel: 1\n---\nDescription here.", encoding="utf-8"
     )
-    response = _run_sidecar(
+    response = sidecar(
         {
             "jsonrpc": "2.0",
             "id": 2,
@@ -55,14 +54,43 @@ def test_import_markdown(tmp_path: Path):
     assert spells[0].get("schema_version") == 2
 
 
-def test_import_spell_with_5e_casting_time_string_preserved(tmp_path: Path):
+def test_import_stream_sends_spells_as_notifications(tmp_path: Path, sidecar_env):
+    first = tmp_path / "first.md"
+    first.write_text("---\nname: First\nlevel: 1\n---\nOne.", encoding="utf-8")
+    second = tmp_path / "second.md"
+    second.write_text("---\nname: Second\nlevel: 2\n---\nTwo.", encoding="utf-8")
+    payload = {
+        "jsonrpc": "2.0",
+        "id": 5,
+        "method": "import",
+        "params": {"files": [str(first), str(second)], "stream": True},
+    }
+    process = subprocess.run(
+        [sys.executable, str(_sidecar_path())],
+        input=json.dumps(payload).encode("utf-8") + b"\n",
+        capture_output=True,
+        check=True,
+        env=sidecar_env,
+    )
+    *notifications, response = [
+        json.loads(line) for line in process.stdout.splitlines()
+    ]
+
+    assert [n["method"] for n in notifications] == ["import.spell", "import.spell"]
+    assert [n["params"]["spell"]["name"] for n in notifications] == ["First", "Second"]
+    assert response["id"] == 5
+    assert response["result"]["spells"] == []
+    assert len(response["result"]["artifacts"]) == 2
+
+
+def test_import_spell_with_5e_casting_time_string_preserved(sidecar, tmp_path: Path):
     """Task 2.2: Sidecar passes casting time string; backend remaps 5e unit to special on parse."""
     sample = tmp_path / "spell.md"
     sample.write_text(
         "---\nname: Bolt\nlevel: 1\ncasting_time: 1 action\n---\nDescription.",
         encoding="utf-8",
     )
-    response = _run_sidecar(
+    response = sidecar(
         {
             "jsonrpc": "2.0",
             "id": 1,
@@ -76,14 +104,14 @@ def test_import_spell_with_5e_casting_time_string_preserved(tmp_path: Path):
     assert spells[0].get("schema_version") == 2
 
 
-def test_import_spell_empty_saving_throw_no_raw_legacy_value(tmp_path: Path):
+def test_import_spell_empty_saving_throw_no_raw_legacy_value(sidecar, tmp_path: Path):
     """Task 2.2: When no saving throw source text, spell has saving_throw None/absent."""
     sample = tmp_path / "spell.md"
     sample.write_text(
         "---\nname: No Save\nlevel: 1\n---\nNo saving throw.",
         encoding="utf-8",
     )
-    response = _run_sidecar(
+    response = sidecar(
         {
             "jsonrpc": "2.0",
             "id": 1,
@@ -98,8 +126,8 @@ def test_import_spell_empty_saving_throw_no_raw_legacy_value(tmp_path: Path):
     assert spells[0].get("schema_version") == 2
 
 
-def test_export_markdown(tmp_path: Path):
-    response = _run_sidecar(
+def test_export_markdown(sidecar, tmp_path: Path):
+    response = sidecar(
         {
             "jsonrpc": "2.0",
             "id": 3,
@@ -114,42 +142,3 @@ def test_export_markdown(tmp_path: Path):
     output_path = Path(response["result"]["path"])
     assert output_path.exists()
     assert "Arcane Bolt" in output_path.read_text(encoding="utf-8")
-
-
-def test_export_camel_case(tmp_path: Path):
-    response = _run_sidecar(
-        {
-            "jsonrpc": "2.0",
-            "id": 4,
-            "method": "export",
-            "params": {
-                "spells": [
-                    {
-                        "name": "Camel Spell",
-                        "description": "Camel Case Test.",
-                        "classList": "Wizard, Sorcerer",
-                        "savingThrow": "Reflex half",
-                        "castingTime": "1 action",
-                        "materialComponents": "A bit of wool",
-                        "level": 3,
-                        "school": "Transmutation",
-                        "components": "V, S",
-                        "range": "60 ft",
-                        "duration": "Instantaneous",
-                    }
-                ],
-                "character": {"name": "Gandalf", "characterType": "Wizard"},
-                "format": "html",
-                "layout": "standard",
-                "mode": "spellbook",
-                "output_dir": str(tmp_path),
-            },
-        }
-    )
-    output_path = Path(response["result"]["path"])
-    content = output_path.read_text(encoding="utf-8")
-
-    # Check that the camelCase fields were rendered
-    assert "Wizard, Sorcerer" in content
-    assert "Reflex half" in content
-    assert "Wizard Spellbook" in content